@@ -50,6 +50,16 @@ function renderTodaySummary(data) {
         data.all_users.map(u => u.username) : 
         [...new Set(data.submissions.map(s => s.username))];
     
+    // Streak info per user, if the report includes it
+    const streaks = {};
+    (data.all_users || []).forEach(u => {
+        if (u.streak) {
+            streaks[u.username] = u.streak;
+        }
+    });
+    const streakText = user => streaks[user] ?
+        `<small class="text-muted">🔥 ${streaks[user].current}-day streak (best ${streaks[user].longest})</small>` : '';
+    
     // Count problems by difficulty (only from today)
     const todaySubmissions = data.submissions.filter(s => s.isToday);
     const easyCount = todaySubmissions.filter(s => s.difficulty === 'Easy').length;
@@ -91,6 +101,7 @@ function renderTodaySummary(data) {
                         <div class="card-body">
                             <h6 class="card-title">${user}</h6>
                             <p class="text-danger">No submissions today</p>
+                            ${streakText(user)}
                         </div>
                     </div>
                 </div>
@@ -130,6 +141,7 @@ function renderTodaySummary(data) {
                                 <span class="difficulty-badge difficulty-medium">${userMedium} Medium</span>
                                 <span class="difficulty-badge difficulty-hard">${userHard} Hard</span>
                             </div>
+                            ${streakText(user)}
                         </div>
                     </div>
                 </div>
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Per-run request budget with priorities, and the backlog of deferred work.
+
+Every request goes through ``BudgetedHttp``, which counts it against the run's
+``RequestBudget`` and notices HTTP 429 responses. Work is admitted by priority:
+
+1. ``ACTIVITY`` - recent submission lists. Requests and time for every user's
+   list are reserved up front, so they are never starved.
+2. ``ENRICH`` - per-problem difficulty lookups.
+3. ``STATS`` - total stats refreshes.
+
+Lower priorities only get what is left after that reservation, and stop for a
+site entirely once it has answered 429. Whatever is turned away is recorded
+in the ``Backlog`` and retried on the next run instead of being dropped.
+"""
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+ACTIVITY, ENRICH, STATS = 0, 1, 2
+
+def domain_of(url):
+    """Map a request URL to the tracker's ``com``/``cn`` domain, or None for other hosts."""
+    host = urlparse(url).netloc
+    if host.endswith("leetcode.cn"):
+        return "cn"
+    if host.endswith("leetcode.com"):
+        return "com"
+    return None
+
+class RequestBudget:
+    """Request and deadline budget for one run, shared out by priority."""
+
+    def __init__(self, max_requests=None, deadline_seconds=None):
+        self.max_requests = max_requests
+        self.deadline_seconds = deadline_seconds
+        self.started = time.monotonic()
+        self.used = 0
+        self.reserved = 0
+        self.throttled = set()
+        self.denied = 0
+
+    def reserve(self, requests):
+        """Set aside ``requests`` for activity lists still to be fetched."""
+        self.reserved = requests
+
+    def release(self, requests):
+        """Return a finished user's activity reservation."""
+        self.reserved = max(0, self.reserved - requests)
+
+    def record(self, url, status_code):
+        """Count one request and note rate limiting by its site."""
+        self.used += 1
+        domain = domain_of(url)
+        if status_code == 429 and domain and domain not in self.throttled:
+            print(f"Rate limited by leetcode.{domain}; deferring lower-priority requests to the next run.")
+            self.throttled.add(domain)
+
+    def allow(self, priority, domain, requests=1):
+        """Return True if ``requests`` of the given priority fit in what is left."""
+        elapsed = time.monotonic() - self.started
+        if self.deadline_seconds is not None and elapsed >= self.deadline_seconds:
+            return self._deny()
+        if self.max_requests is not None and self.used >= self.max_requests:
+            return self._deny()
+        if priority == ACTIVITY:
+            return True
+        if domain in self.throttled:
+            return self._deny()
+        # Lower priorities must leave the activity reservation untouched
+        if self.max_requests is not None and self.used + self.reserved + requests > self.max_requests:
+            return self._deny()
+        if self.deadline_seconds is not None and self.used:
+            seconds_per_request = elapsed / self.used
+            if elapsed + (self.reserved + requests) * seconds_per_request > self.deadline_seconds:
+                return self._deny()
+        return True
+
+    def _deny(self):
+        self.denied += 1
+        return False
+
+class BudgetedHttp:
+    """Wrap an HTTP client so every request is counted against a ``RequestBudget``."""
+
+    def __init__(self, http, budget):
+        self._http = http
+        self.budget = budget
+
+    def __getattr__(self, name):
+        # Pass through client attributes such as ``clock`` and ``throttle``
+        return getattr(self._http, name)
+
+    def get(self, url, **kwargs):
+        response = self._http.get(url, **kwargs)
+        self.budget.record(url, response.status_code)
+        return response
+
+    def post(self, url, **kwargs):
+        response = self._http.post(url, **kwargs)
+        self.budget.record(url, response.status_code)
+        return response
+
+    def Session(self):
+        return BudgetedHttp(self._http.Session(), self.budget)
+
+class Backlog:
+    """JSON-backed queue of difficulty lookups and stats refreshes deferred to the next run."""
+
+    def __init__(self, path):
+        self.path = path
+        self.problems = {}
+        self.stats = set()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            for item in data.get("problems", []):
+                self.problems[f"{item['domain']}:{item['slug']}"] = item
+            self.stats = set(data.get("stats", []))
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError:
+            print(f"Warning: backlog file '{path}' is not valid JSON, starting empty.")
+
+    def defer_problem(self, domain, slug, username):
+        self.problems[f"{domain}:{slug}"] = {"domain": domain, "slug": slug, "username": username}
+
+    def pending_problems(self):
+        """Return the deferred difficulty lookups; each stays queued until resolved."""
+        return list(self.problems.values())
+
+    def resolve_problem(self, domain, slug):
+        self.problems.pop(f"{domain}:{slug}", None)
+
+    def defer_stats(self, user_key):
+        self.stats.add(user_key)
+
+    def clear_stats(self, user_key):
+        self.stats.discard(user_key)
+
+    def __len__(self):
+        return len(self.problems) + len(self.stats)
+
+    def save(self):
+        with open(self.path + ".tmp", 'w') as f:
+            json.dump({"problems": list(self.problems.values()), "stats": sorted(self.stats)}, f, indent=2)
+        os.replace(self.path + ".tmp", self.path)
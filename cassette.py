@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""Record and replay the tracker's HTTP traffic.
+
+A cassette is a gzip-compressed JSON lines file. The first line is a header
+holding the time the recording started and the state files (stats cache,
+backlog, streaks) the run started from; every following line is one
+request/response interaction (sheet CSV, GraphQL calls and CN HTML pages).
+
+``CassetteRecorder`` and ``CassettePlayer`` both expose the small slice of the
+``requests`` module the tracker uses (``get``, ``post`` and ``Session``), so
+either can be passed to ``LeetCodeTracker(http=...)``.
+
+A recorded run uses and updates the real state files like any other run.
+Replay restores the recorded copies into a scratch ``state_dir``, so it
+starts from the same state as the recording and never touches the real files.
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+
+CASSETTE_VERSION = 1
+
+class CassetteMissError(LookupError):
+    """Raised when replay is asked for a request that was never recorded."""
+
+def _scratch_state_dir():
+    return tempfile.mkdtemp(prefix="cassette-state-")
+
+def _request_key(method, url, kwargs):
+    """Build the key used to match a replayed request to a recorded one."""
+    body = kwargs.get("json")
+    if body is None:
+        body = kwargs.get("data")
+    params = kwargs.get("params")
+    return json.dumps([method.upper(), url, params, body], sort_keys=True, default=str)
+
+class ReplayResponse:
+    """Minimal stand-in for ``requests.Response`` built from a cassette entry."""
+
+    def __init__(self, entry):
+        self.status_code = entry["status"]
+        self.text = entry["text"]
+        self.url = entry["url"]
+        self.elapsed_seconds = entry.get("elapsed", 0.0)
+
+    def json(self):
+        return json.loads(self.text)
+
+class CassetteRecorder:
+    """Forward requests to the network and append every interaction to a cassette."""
+
+    throttle = True
+
+    def __init__(self, path):
+        # Imported here so replay works without the network stack installed
+        import requests
+        self._requests = requests
+        self.path = path
+        self.count = 0
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        # Written with the first interaction, so state snapshots taken before it land in the header
+        self._header = {"version": CASSETTE_VERSION, "recorded_at": time.time(), "state": {}}
+
+    def _write_line(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        # Flush each entry so a crashed run still leaves a usable cassette
+        self._file.flush()
+
+    def _write_header(self):
+        if self._header is not None:
+            header, self._header = self._header, None
+            self._write_line(header)
+
+    def _write(self, entry):
+        self._write_header()
+        self._write_line(entry)
+
+    def snapshot_state(self, paths):
+        """Store the current contents of the given state files, keyed by file name."""
+        state = {}
+        for path in paths:
+            if os.path.isfile(path):
+                with open(path, "r") as f:
+                    state[os.path.basename(path)] = f.read()
+        if self._header is not None:
+            self._header["state"].update(state)
+        elif state:
+            # Trackers created after the first request add a state line instead
+            self._write({"state": state})
+
+    def record(self, method, url, kwargs, send, cookies=None):
+        """Send one request through ``send`` and record the response."""
+        started = time.monotonic()
+        response = send(url, **kwargs)
+        self._write({
+            "key": _request_key(method, url, kwargs),
+            "url": url,
+            "status": response.status_code,
+            "text": response.text,
+            "elapsed": round(time.monotonic() - started, 3),
+            "cookies": dict(cookies) if cookies is not None else None
+        })
+        self.count += 1
+        return response
+
+    def get(self, url, **kwargs):
+        return self.record("GET", url, kwargs, self._requests.get)
+
+    def post(self, url, **kwargs):
+        return self.record("POST", url, kwargs, self._requests.post)
+
+    def Session(self):
+        return RecordingSession(self, self._requests.Session())
+
+    def close(self):
+        self._write_header()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class RecordingSession:
+    """Wrap a ``requests.Session`` so its traffic and cookies are recorded."""
+
+    def __init__(self, recorder, session):
+        self._recorder = recorder
+        self._session = session
+
+    @property
+    def cookies(self):
+        return self._session.cookies
+
+    def get(self, url, **kwargs):
+        return self._recorder.record("GET", url, kwargs, self._session.get, self._session.cookies)
+
+    def post(self, url, **kwargs):
+        return self._recorder.record("POST", url, kwargs, self._session.post, self._session.cookies)
+
+class CassettePlayer:
+    """Serve recorded responses back without touching the network.
+
+    Identical requests are replayed in recording order; once a key runs out
+    its last response is repeated. ``latency`` scales the recorded response
+    time (``0`` replays instantly, ``1.0`` reproduces the original timing).
+    The player also reports the recording time through ``clock`` so date
+    windows line up with the recorded run.
+
+    The tracker reports most request errors and carries on, so misses are
+    also counted, and ``close`` raises ``CassetteMissError`` if there were
+    any: a replay that strays from its recording fails instead of quietly
+    producing a different report.
+    """
+
+    # Rate-limit pauses are pointless when nothing goes over the wire
+    throttle = False
+
+    def __init__(self, path, latency=0.0):
+        self.path = path
+        self.latency = latency
+        self.misses = []
+        self.state_dir = _scratch_state_dir()
+        self._entries = {}
+        self._last = {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != CASSETTE_VERSION:
+                raise ValueError(f"Unsupported cassette version in '{path}': {header.get('version')}")
+            self.recorded_at = header["recorded_at"]
+            self._restore_state(header.get("state", {}))
+            for line in f:
+                entry = json.loads(line)
+                if "state" in entry:
+                    self._restore_state(entry["state"])
+                    continue
+                self._entries.setdefault(entry["key"], []).append(entry)
+        for key in self._entries:
+            self._entries[key].reverse()
+
+    def _restore_state(self, state):
+        for name, content in state.items():
+            with open(os.path.join(self.state_dir, name), "w") as f:
+                f.write(content)
+
+    def clock(self):
+        """Return the time the cassette was recorded, in epoch seconds."""
+        return self.recorded_at
+
+    def play(self, method, url, kwargs, cookies=None):
+        """Return the recorded response for a request."""
+        key = _request_key(method, url, kwargs)
+        pending = self._entries.get(key)
+        if pending:
+            entry = pending.pop()
+            self._last[key] = entry
+        elif key in self._last:
+            entry = self._last[key]
+        else:
+            self.misses.append(f"{method.upper()} {url}")
+            raise CassetteMissError(f"No recorded response for {method.upper()} {url}")
+        if self.latency:
+            time.sleep(entry.get("elapsed", 0.0) * self.latency)
+        if cookies is not None and entry.get("cookies"):
+            cookies.update(entry["cookies"])
+        return ReplayResponse(entry)
+
+    def get(self, url, **kwargs):
+        return self.play("GET", url, kwargs)
+
+    def post(self, url, **kwargs):
+        return self.play("POST", url, kwargs)
+
+    def Session(self):
+        return ReplaySession(self)
+
+    def close(self):
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        if self.misses:
+            misses, self.misses = self.misses, []
+            raise CassetteMissError(
+                f"{len(misses)} request(s) not found in '{self.path}', first: {misses[0]}"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            # Let the original error through rather than a report of the misses
+            shutil.rmtree(self.state_dir, ignore_errors=True)
+        return False
+
+class ReplaySession:
+    """Session stand-in that replays cookies alongside responses."""
+
+    def __init__(self, player):
+        self._player = player
+        self.cookies = {}
+
+    def get(self, url, **kwargs):
+        return self._player.play("GET", url, kwargs, self.cookies)
+
+    def post(self, url, **kwargs):
+        return self._player.play("POST", url, kwargs, self.cookies)
+
+def add_cassette_arguments(parser):
+    """Add ``--record``/``--replay`` options to an argparse parser."""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="CASSETTE",
+                       help="record every HTTP request and response to a cassette file")
+    group.add_argument("--replay", metavar="CASSETTE",
+                       help="serve HTTP responses from a cassette file instead of the network")
+    parser.add_argument("--replay-latency", type=float, default=0.0, metavar="FACTOR",
+                        help="scale recorded response times during replay (default: 0, no delay)")
+
+def http_from_args(args):
+    """Return the HTTP client selected by ``add_cassette_arguments`` options, or None."""
+    if args.record:
+        return CassetteRecorder(args.record)
+    if args.replay:
+        return CassettePlayer(args.replay, latency=args.replay_latency)
+    return None
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Single entry point with separate network and rendering steps.
+
+    python cli.py fetch                 # network only, writes raw_data.ndjson
+    python cli.py render                # offline: console table + report_data.json
+    python cli.py bench --repeat 5      # time rendering (and a replayed fetch)
+
+Repeat ``--config`` to run several cohorts at once: ``fetch`` fetches the
+deduplicated union of their users in one pass, and ``render`` writes each
+cohort's report to the ``report_file`` set in its config.
+
+Heavy dependencies are imported inside the commands that use them: ``render``
+never loads requests, and loads pandas only to append to the Parquet history
+when ``history_dir`` is set, so it can be rerun quickly while tuning the
+dashboard.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from cassette import add_cassette_arguments, http_from_args
+
+def fetch(config_file, raw_path, http=None, state_dir=None):
+    """Fetch every user's data and store it as raw NDJSON; return the submission count.
+
+    ``config_file`` may be a list of cohort configs, whose users are fetched once.
+    """
+    if isinstance(config_file, (list, tuple)):
+        if len(config_file) > 1:
+            from cohorts import CohortSet
+            return CohortSet(config_file, http=http, state_dir=state_dir).fetch(raw_path)
+        config_file = config_file[0]
+
+    from leetcode_tracker import LeetCodeTracker
+    from raw_data import RawDataWriter
+
+    tracker = LeetCodeTracker(config_file, http=http, state_dir=state_dir)
+    with RawDataWriter(raw_path, tracker.clock()) as writer:
+        tracker.fetch(writer)
+    return writer.count
+
+def _load_config(config_file):
+    try:
+        with open(config_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def render(config_file, raw_path, output_path=None, per_cohort=False, state_dir=None):
+    """Render stored raw data to the console and, optionally, a report file.
+
+    Only the users of the config's cohort are rendered when the raw data was
+    fetched for several cohorts. With ``per_cohort``, a config without a
+    ``streaks_file`` keeps its streaks in ``<cohort>_streaks.json``, since
+    cohorts with different windows must not share streak state, and history
+    files are tagged with the cohort name. With ``history_dir`` set, the
+    submissions are also appended to the Parquet history.
+    """
+    from cohorts import cohort_name
+    from generate_web_report import TeeSink, close_history_writer, open_history_writer, open_report_writer
+    from leetcode_tracker import LeetCodeTracker
+    from raw_data import RawDataReader
+    from streaks import StreakEngine
+
+    config = _load_config(config_file)
+    name = cohort_name(config_file, config)
+    with RawDataReader(raw_path) as reader:
+        tracker = LeetCodeTracker(config_file, users=reader.users_for(name), clock=reader.clock,
+                                  state_dir=state_dir)
+        if per_cohort and "streaks_file" not in config:
+            tracker.streaks = StreakEngine(tracker.state_path("streaks_file", f"{name}_streaks.json"))
+        history = open_history_writer(tracker, tag=name if per_cohort else None)
+
+        if not output_path:
+            report_data = tracker.generate_report(sink=history, source=reader)
+        else:
+            with open_report_writer(output_path, tracker) as writer:
+                sink = TeeSink(writer, history) if history is not None else writer
+                report_data = tracker.generate_report(sink=sink, source=reader)
+                writer.report_data = report_data
+
+        if history is not None:
+            close_history_writer(history, report_data, tracker)
+        return report_data
+
+def cmd_fetch(args):
+    http = http_from_args(args)
+    try:
+        count = fetch(args.config, args.raw, http=http)
+    finally:
+        if http is not None:
+            http.close()
+    print(f"Fetched {count} submissions into '{args.raw}'.")
+
+def _output_paths(args):
+    """Pair each config with its report file: ``--output`` for one cohort, else each config's ``report_file``."""
+    if len(args.config) == 1:
+        output = "report_data.json" if args.output is None else args.output
+        return [(args.config[0], output)]
+    if args.output:
+        raise SystemExit("Error: --output cannot be used with several configs; set report_file in each config instead.")
+    pairs = [(config_file, _load_config(config_file).get("report_file", "report_data.json"))
+             for config_file in args.config]
+    outputs = [output for _, output in pairs]
+    if len(set(outputs)) != len(outputs):
+        raise SystemExit(f"Error: cohorts must write different report files, got: {', '.join(outputs)}")
+    return pairs
+
+def cmd_render(args):
+    for config_file, output in _output_paths(args):
+        if len(args.config) > 1:
+            print(f"\n=== {config_file} ===")
+        render(config_file, args.raw, output, per_cohort=len(args.config) > 1)
+        if output:
+            print(f"Report written to '{output}'.")
+
+def _timed(function, *args, **kwargs):
+    """Run ``function`` with its console output suppressed and return the elapsed seconds."""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        function(*args, **kwargs)
+    return time.perf_counter() - started
+
+def _summary(label, timings):
+    print(f"{label:<18} min {min(timings) * 1000:8.1f} ms   median {statistics.median(timings) * 1000:8.1f} ms   runs {len(timings)}")
+
+def _copy_state(config_file, state_dir):
+    """Copy a config's state files into ``state_dir`` so a run can use them without changing them."""
+    from leetcode_tracker import STATE_FILES
+
+    config = _load_config(config_file)
+    for key, default in STATE_FILES:
+        path = config.get(key, default)
+        if os.path.exists(path):
+            shutil.copy(path, os.path.join(state_dir, os.path.basename(path)))
+
+def cmd_bench(args):
+    import tracemalloc
+
+    started = time.perf_counter()
+    import leetcode_tracker
+    print(f"{'import tracker':<18} {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as scratch:
+        # Renders work on copies of the state files; a benchmark must not change the real ones
+        state_dir = os.path.join(scratch, "state")
+        os.mkdir(state_dir)
+        _copy_state(args.config[0], state_dir)
+
+        raw_path = args.raw
+        if args.replay:
+            from cassette import CassettePlayer
+
+            raw_path = os.path.join(scratch, "raw_data.ndjson")
+            timings = []
+            for _ in range(args.repeat):
+                # The player keeps its own scratch state, matching the recording
+                with CassettePlayer(args.replay) as player:
+                    timings.append(_timed(fetch, args.config, raw_path, http=player))
+            _summary("fetch (replay)", timings)
+
+        output_path = os.path.join(scratch, "report_data.json")
+        timings = [_timed(render, args.config[0], raw_path, output_path, state_dir=state_dir)
+                   for _ in range(args.repeat)]
+        _summary("render", timings)
+
+        tracemalloc.start()
+        _timed(render, args.config[0], raw_path, output_path, state_dir=state_dir)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{'render peak memory':<18} {peak / 1024 / 1024:8.2f} MiB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Track LeetCode activity for a cohort.")
+    parser.add_argument("--config", action="append",
+                        help="config file, repeat for several cohorts (default: config.json)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    fetch_parser = commands.add_parser("fetch", help="fetch data from the network and store it raw")
+    fetch_parser.add_argument("--raw", default="raw_data.ndjson", help="raw data file to write (default: raw_data.ndjson)")
+    add_cassette_arguments(fetch_parser)
+    fetch_parser.set_defaults(handler=cmd_fetch)
+
+    render_parser = commands.add_parser("render", help="render stored raw data without the network")
+    render_parser.add_argument("--raw", default="raw_data.ndjson", help="raw data file to read (default: raw_data.ndjson)")
+    render_parser.add_argument("--output", "-o",
+                               help="report file to write, .ndjson for NDJSON; empty for console only "
+                                    "(default: report_data.json, or each config's report_file for several configs)")
+    render_parser.set_defaults(handler=cmd_render)
+
+    bench_parser = commands.add_parser("bench", help="time rendering, and fetching from a cassette")
+    bench_parser.add_argument("--raw", default="raw_data.ndjson", help="raw data file to render (default: raw_data.ndjson)")
+    bench_parser.add_argument("--replay", metavar="CASSETTE", help="also time a fetch replayed from this cassette")
+    bench_parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (default: 3)")
+    bench_parser.set_defaults(handler=cmd_bench)
+
+    args = parser.parse_args(argv)
+    args.config = args.config or ["config.json"]
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
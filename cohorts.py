@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Several cohorts, each with its own config file, served by one fetch pass.
+
+Every cohort's roster is loaded from its own config (and Google Sheet). Users
+are deduplicated across cohorts and fetched once by a single tracker, so the
+HTTP connection pool, request budget, rate-limit pauses, problem cache, stats
+snapshots and backlog are all shared. The raw data records which cohorts each
+user belongs to, and each cohort's report is rendered from it separately.
+"""
+import os
+
+def cohort_name(config_file, config):
+    """Return a cohort's name: its config's ``cohort`` key, or the config file's stem."""
+    return config.get("cohort") or os.path.splitext(os.path.basename(config_file))[0]
+
+class CohortSet:
+    """Rosters of several cohorts and the deduplicated union fetched for all of them."""
+
+    def __init__(self, config_files, http=None, state_dir=None):
+        from leetcode_tracker import LeetCodeTracker, PooledHttp
+
+        self.config_files = list(config_files)
+        # One client for every tracker, so the whole run shares a connection pool
+        self.http = http if http is not None else PooledHttp()
+        self.state_dir = state_dir
+        # One tracker per cohort, used only for its roster and settings
+        self.trackers = [LeetCodeTracker(config_file, http=self.http, state_dir=state_dir)
+                         for config_file in self.config_files]
+        self.names = [cohort_name(f, t.config) for f, t in zip(self.config_files, self.trackers)]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"Cohort names must be unique, got: {', '.join(self.names)}")
+
+        # Union roster in order of first appearance, and each user's cohorts
+        self.users = []
+        self.membership = {}
+        domains = {}
+        for name, tracker in zip(self.names, self.trackers):
+            for username, domain, display_name in tracker.iter_roster():
+                if username not in domains:
+                    self.users.append({"username": username, "domain": domain, "wx_name": display_name})
+                    domains[username] = domain
+                    self.membership[username] = {}
+                elif domains[username] != domain:
+                    # Users are fetched and reported by username, so one name cannot cover two sites
+                    raise ValueError(f"{username} is on '{domains[username]}' in one cohort and "
+                                     f"'{domain}' in {name}; use the same domain in every cohort")
+                self.membership[username][name] = display_name
+
+    def union_tracker(self):
+        """Return one tracker covering every cohort's users with the widest settings."""
+        from leetcode_tracker import LeetCodeTracker
+
+        tracker = LeetCodeTracker(self.config_files[0], http=self.http, users=self.users,
+                                  state_dir=self.state_dir)
+        tracker.days_to_track = max(t.days_to_track for t in self.trackers)
+        # Total stats only for users in at least one cohort that asks for them
+        stats_cohorts = {name for name, t in zip(self.names, self.trackers) if t.fetch_total_stats}
+        tracker.fetch_total_stats = bool(stats_cohorts)
+        tracker.stats_users = {
+            username for username, cohorts in self.membership.items() if stats_cohorts & cohorts.keys()
+        }
+        return tracker
+
+    def fetch(self, raw_path):
+        """Fetch the union once into a raw data file; return the submission count."""
+        from raw_data import RawDataWriter
+
+        tracker = self.union_tracker()
+        duplicates = sum(len(t.users) for t in self.trackers) - len(self.users)
+        print(f"Fetching {len(self.users)} users for {len(self.trackers)} cohorts "
+              f"({duplicates} shared users fetched once).")
+        with RawDataWriter(raw_path, tracker.clock(), membership=self.membership) as writer:
+            tracker.fetch(writer)
+        return writer.count
@@ -1,70 +1,168 @@
 #!/usr/bin/env python3
+import argparse
 import json
 import os
-import time
 from datetime import datetime, timedelta, timezone
+from cassette import add_cassette_arguments, http_from_args
 from leetcode_tracker import LeetCodeTracker
 
-def generate_web_report():
-    """Generate a JSON report for the web dashboard."""
-    tracker = LeetCodeTracker()
-    report_data = {
-        "timestamp": int(time.time()),
-        "submissions": [],
-        "all_users": []  # Add a new field to track all configured users
-    }
-    
-    # Add all users to the report data
-    for username in tracker.users:
-        report_data["all_users"].append({
+# Define UTC-7 timezone
+UTC_MINUS_7 = timezone(timedelta(hours=-7))
+
+class JsonReportWriter:
+    """Sink stage: write the dashboard JSON incrementally, one submission at a time."""
+
+    def __init__(self, path, tracker, today=None):
+        self.path = path
+        self.tracker = tracker
+        # Get today's date in UTC-7 for comparison
+        self.timestamp = int(tracker.clock())
+        self.today = today or datetime.fromtimestamp(self.timestamp, UTC_MINUS_7).date()
+        self.count = 0
+        # Per-user aggregates from generate_report, used for the user entries
+        self.report_data = {}
+        self._file = None
+
+    def __enter__(self):
+        # Write to a temporary file so a failed run never leaves a truncated report behind
+        self._file = open(self.path + ".tmp", "w")
+        self.write_header()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.write_footer()
+                self._file.close()
+                os.replace(self.path + ".tmp", self.path)
+        finally:
+            self._file.close()
+            # Clean up the temporary file on any failure, including in the footer
+            if os.path.exists(self.path + ".tmp"):
+                os.remove(self.path + ".tmp")
+        return False
+
+    def to_record(self, username, domain, submission):
+        """Convert a tracker submission into the web report format."""
+        # Convert timestamp to check if it's today in UTC-7
+        submission_time = int(submission.get("timestamp") or 0)
+        submission_date = datetime.fromtimestamp(submission_time, UTC_MINUS_7).date()
+
+        # Only include required data for the web report
+        return {
             "username": username,
-            "domain": tracker.user_domains.get(username, "com"),
-            "display_name": tracker.user_display_names.get(username, username)
-        })
-    
-    # Get submissions report
-    raw_report = tracker.generate_report()
-    
-    # Define UTC-7 timezone
-    utc_minus_7 = timezone(timedelta(hours=-7))
-    
-    # Get today's date in UTC-7 for comparison
-    today = datetime.now(utc_minus_7).date()
-    
-    # Process submissions
-    for username in raw_report:
-        user_data = raw_report[username]
-        # Skip empty reports
-        if not user_data or "submissions" not in user_data:
-            continue
-        
-        # Get domain info for this user
-        domain = tracker.user_domains.get(username, "com")
-        
-        # Add each submission
-        for submission in user_data.get("submissions", []):
-            # Convert timestamp to check if it's today in UTC-7
-            submission_time = int(submission.get("timestamp", 0))
-            submission_date = datetime.fromtimestamp(submission_time, utc_minus_7).date()
-            is_today = (submission_date == today)
-            
-            # Only include required data for the web report
-            report_data["submissions"].append({
+            "title": submission.get("title", "Unknown Problem"),
+            "titleSlug": submission.get("titleSlug", ""),
+            "difficulty": (submission.get("question") or {}).get("difficulty", "Unknown"),
+            "timestamp": submission.get("timestamp", 0),
+            "domain": domain,
+            "isToday": submission_date == self.today
+        }
+
+    def user_records(self):
+        """Yield one entry per configured user, including users without submissions."""
+        for username, domain, display_name in self.tracker.iter_roster():
+            record = {
                 "username": username,
-                "title": submission.get("title", "Unknown Problem"),
-                "titleSlug": submission.get("titleSlug", ""),
-                "difficulty": submission.get("question", {}).get("difficulty", "Unknown"),
-                "timestamp": submission.get("timestamp", 0),
                 "domain": domain,
-                "isToday": is_today
-            })
-    
-    # Save the report as JSON
-    output_dir = "."
-    with open(os.path.join(output_dir, "report_data.json"), "w") as f:
-        json.dump(report_data, f, indent=2)
-    
-    print(f"Web report generated with {len(report_data['submissions'])} submissions.")
+                "display_name": display_name
+            }
+            streak = self.report_data.get(username, {}).get("streak")
+            if streak is not None:
+                record["streak"] = streak
+            yield record
+
+    def write_header(self):
+        self._file.write('{\n  "timestamp": %d,\n  "submissions": [' % self.timestamp)
+
+    def write(self, username, domain, submission):
+        record = self.to_record(username, domain, submission)
+        separator = ",\n" if self.count else "\n"
+        self._file.write(separator + _indent(json.dumps(record, indent=2), "    "))
+        self.count += 1
+
+    def write_footer(self):
+        self._file.write("\n  ],\n  \"all_users\": [" if self.count else "],\n  \"all_users\": [")
+        for index, record in enumerate(self.user_records()):
+            separator = ",\n" if index else "\n"
+            self._file.write(separator + _indent(json.dumps(record, indent=2), "    "))
+        self._file.write("\n  ]\n}")
+
+class NdjsonReportWriter(JsonReportWriter):
+    """Sink stage: write one JSON object per line, tagged with a ``type`` field."""
+
+    def write_header(self):
+        self._file.write(json.dumps({"type": "meta", "timestamp": self.timestamp}) + "\n")
+
+    def write(self, username, domain, submission):
+        record = self.to_record(username, domain, submission)
+        self._file.write(json.dumps({"type": "submission", **record}) + "\n")
+        self.count += 1
+
+    def write_footer(self):
+        for record in self.user_records():
+            self._file.write(json.dumps({"type": "user", **record}) + "\n")
+
+class TeeSink:
+    """Fan one submission stream out to several sinks."""
+
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, username, domain, submission):
+        for sink in self.sinks:
+            sink.write(username, domain, submission)
+
+def _indent(text, prefix):
+    """Indent every line of a pretty-printed JSON fragment."""
+    return "\n".join(prefix + line for line in text.splitlines())
+
+def open_report_writer(output_path, tracker):
+    """Return the report writer for ``output_path``: NDJSON for ``.ndjson``, JSON otherwise."""
+    writer_class = NdjsonReportWriter if output_path.endswith(".ndjson") else JsonReportWriter
+    return writer_class(output_path, tracker)
+
+def open_history_writer(tracker, tag=None):
+    """Return a Parquet history sink for the tracker's ``history_dir``, or None if it is not set."""
+    history_dir = tracker.state_path("history_dir")
+    if not history_dir:
+        return None
+    from history import HistoryWriter
+    return HistoryWriter(history_dir, tracker.clock(), tag=tag)
+
+def close_history_writer(history, report_data, tracker):
+    """Flush a history sink and append the run's per-user stats."""
+    history.close()
+    history.write_stats(report_data, tracker.iter_roster())
+    print(f"Appended {history.count} submissions to history in '{history.root}'.")
+
+def generate_web_report(output_path="report_data.json", http=None, config_file="config.json"):
+    """Generate a JSON (or NDJSON, by extension) report for the web dashboard."""
+    tracker = LeetCodeTracker(config_file, http=http)
+
+    # Optional Parquet history export, appended to on every run
+    history = open_history_writer(tracker)
+
+    with open_report_writer(output_path, tracker) as writer:
+        sink = TeeSink(writer, history) if history is not None else writer
+        report_data = tracker.generate_report(sink=sink)
+        writer.report_data = report_data
+
+    if history is not None:
+        close_history_writer(history, report_data, tracker)
+
+    print(f"Web report generated with {writer.count} submissions.")
 
 if __name__ == "__main__":
-    generate_web_report() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the web dashboard report.")
+    parser.add_argument("output", nargs="?", default="report_data.json",
+                        help="output path; a .ndjson suffix writes one JSON object per line")
+    add_cassette_arguments(parser)
+    args = parser.parse_args()
+
+    http = http_from_args(args)
+    try:
+        generate_web_report(args.output, http=http)
+    finally:
+        if http is not None:
+            http.close()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""Append-only Parquet history of submissions and per-run stats.
+
+Each run appends new files under ``<history_dir>/submissions`` and
+``<history_dir>/runs``, partitioned by ``date`` (UTC-7) and ``domain``. Old
+partitions are never rewritten. Hourly runs see overlapping submissions, so
+readers drop duplicates when loading.
+
+Writing and reading need ``pyarrow`` (``pip install pyarrow``).
+
+Run ``python history.py --help`` for the query commands.
+"""
+import argparse
+import os
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from tabulate import tabulate
+from streaks import compute_streaks, with_user_keys
+
+# Define UTC-7 timezone
+UTC_MINUS_7 = timezone(timedelta(hours=-7))
+
+PARTITION_COLUMNS = ["date", "domain"]
+
+class HistoryWriter:
+    """Export stage: append a run's submissions and per-user stats as Parquet partitions.
+
+    Works as a report sink. Rows are flushed every ``chunk_rows`` submissions,
+    so memory stays bounded on large cohorts.
+    """
+
+    def __init__(self, root, run_timestamp, chunk_rows=10000, tag=None):
+        self.root = root
+        self.run_timestamp = int(run_timestamp)
+        # Tells apart files from several cohorts rendered from the same run
+        self.tag = tag
+        self.chunk_rows = chunk_rows
+        self.count = 0
+        self._rows = []
+        self._chunks = 0
+
+    def write(self, username, domain, submission):
+        timestamp = int(submission.get("timestamp") or 0)
+        self._rows.append({
+            "username": username,
+            "domain": domain,
+            "submission_id": str(submission.get("id") or ""),
+            "title": submission.get("title") or "",
+            "title_slug": submission.get("titleSlug") or "",
+            "difficulty": (submission.get("question") or {}).get("difficulty", "Unknown"),
+            "timestamp": timestamp,
+            "date": datetime.fromtimestamp(timestamp, UTC_MINUS_7).date().isoformat(),
+            "run_timestamp": self.run_timestamp
+        })
+        self.count += 1
+        if len(self._rows) >= self.chunk_rows:
+            self.flush()
+
+    def write_stats(self, report_data, roster):
+        """Append one row per user with the run's aggregated stats."""
+        run_date = datetime.fromtimestamp(self.run_timestamp, UTC_MINUS_7).date().isoformat()
+        rows = []
+        for username, domain, _ in roster:
+            user_data = report_data.get(username)
+            if not user_data:
+                continue
+            total_stats = user_data.get("total_stats") or {}
+            rows.append({
+                "username": username,
+                "domain": domain,
+                "date": run_date,
+                "run_timestamp": self.run_timestamp,
+                **user_data["stats"],
+                "total_easy": total_stats.get("Easy"),
+                "total_medium": total_stats.get("Medium"),
+                "total_hard": total_stats.get("Hard"),
+                "total": total_stats.get("Total")
+            })
+        if rows:
+            frame = pd.DataFrame(rows)
+            for column in ("total_easy", "total_medium", "total_hard", "total"):
+                frame[column] = frame[column].astype("Int64")
+            self._append(frame, "runs")
+
+    def flush(self):
+        """Write buffered submissions as a new set of partition files."""
+        if not self._rows:
+            return
+        self._append(pd.DataFrame(self._rows), "submissions")
+        self._rows = []
+
+    def _append(self, frame, table):
+        run = f"run-{self.run_timestamp}-{self.tag}" if self.tag else f"run-{self.run_timestamp}"
+        frame.to_parquet(
+            os.path.join(self.root, table),
+            partition_cols=PARTITION_COLUMNS,
+            index=False,
+            # A unique name per run and chunk keeps earlier files untouched
+            basename_template=f"{run}-{self._chunks}-{{i}}.parquet"
+        )
+        self._chunks += 1
+
+    def close(self):
+        self.flush()
+
+def load_submissions(root):
+    """Load all recorded submissions, one row per distinct accepted submission."""
+    frame = pd.read_parquet(os.path.join(root, "submissions"))
+    frame["date"] = pd.to_datetime(frame["date"].astype(str))
+    frame["domain"] = frame["domain"].astype(str)
+    # Later runs may have resolved a difficulty an earlier run could not
+    frame = frame.sort_values("run_timestamp")
+    return frame.drop_duplicates(["domain", "username", "title_slug", "timestamp"], keep="last")
+
+def load_runs(root):
+    """Load the per-run stats rows."""
+    frame = pd.read_parquet(os.path.join(root, "runs"))
+    frame["date"] = pd.to_datetime(frame["date"].astype(str))
+    frame["domain"] = frame["domain"].astype(str)
+    return frame
+
+def top_solvers(submissions, days=None, limit=10):
+    """Rank users by distinct problems solved, optionally within the last ``days`` days."""
+    if days:
+        cutoff = submissions["date"].max() - pd.Timedelta(days=days - 1)
+        submissions = submissions[submissions["date"] >= cutoff]
+    grouped = submissions.assign(hard=submissions["difficulty"].eq("Hard")).groupby("username")
+    table = pd.DataFrame({
+        "problems": grouped["title_slug"].nunique(),
+        "submissions": grouped.size(),
+        "active_days": grouped["date"].nunique(),
+        "hard": grouped["hard"].sum()
+    })
+    return table.sort_values(["problems", "hard"], ascending=False).head(limit)
+
+def difficulty_mix(submissions, freq="W"):
+    """Count submissions per difficulty for each period (``D``, ``W`` or ``M``)."""
+    freq = {"M": "MS"}.get(freq, freq)
+    table = (
+        submissions.groupby([pd.Grouper(key="date", freq=freq), "difficulty"])
+        .size()
+        .unstack(fill_value=0)
+    )
+    table["Total"] = table.sum(axis=1)
+    table.index = table.index.strftime("%Y-%m-%d")
+    return table
+
+def streaks(submissions, today):
+    """Return current and longest daily streaks per user (``domain:username``) from their active days."""
+    return compute_streaks(with_user_keys(submissions), today).drop(columns="latest_run")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the Parquet submission history.")
+    parser.add_argument("--root", default="history", help="history directory (default: history)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    top = commands.add_parser("top", help="users ranked by distinct problems solved")
+    top.add_argument("--days", type=int, help="only count the last N days")
+    top.add_argument("--limit", type=int, default=10, help="number of users to show")
+
+    mix = commands.add_parser("mix", help="difficulty mix over time")
+    mix.add_argument("--freq", choices=["D", "W", "M"], default="W", help="period length")
+
+    commands.add_parser("streaks", help="current and longest daily streaks")
+
+    args = parser.parse_args(argv)
+    submissions = load_submissions(args.root)
+
+    if args.command == "top":
+        table = top_solvers(submissions, args.days, args.limit)
+    elif args.command == "mix":
+        table = difficulty_mix(submissions, args.freq)
+    else:
+        table = streaks(submissions, datetime.now(UTC_MINUS_7).date())
+
+    print(tabulate(table, headers="keys", tablefmt="grid"))
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,146 @@
 #!/usr/bin/env python3
 import json
-import requests
+import os
 from datetime import datetime, timedelta, timezone
 import time
 from collections import defaultdict
 import sys
-from tabulate import tabulate
 import re
-import pandas as pd
-from io import StringIO
+from budget import ACTIVITY, ENRICH, STATS, Backlog, BudgetedHttp, RequestBudget
+from stats_cache import DIFFICULTIES, StatsCache, infer_difficulty
+from streaks import StreakEngine
 
 # Add a function to get the current time in UTC-7
-def get_utc7_now():
-    """Return current datetime in UTC-7 timezone."""
-    return datetime.now(timezone.utc) - timedelta(hours=7)
+def get_utc7_now(timestamp=None):
+    """Return current (or the given epoch) datetime in UTC-7 timezone."""
+    if timestamp is None:
+        return datetime.now(timezone.utc) - timedelta(hours=7)
+    return datetime.fromtimestamp(timestamp, timezone.utc) - timedelta(hours=7)
+
+class PooledHttp:
+    """``requests``-like client whose ``get``/``post`` share one keep-alive connection pool.
+    
+    ``Session()`` still returns a fresh session, for callers that need their
+    own cookies (the LeetCode.cn profile visit).
+    """
+
+    def __init__(self):
+        import requests
+        self._requests = requests
+        self._session = requests.Session()
+
+    def get(self, url, **kwargs):
+        return self._session.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._session.post(url, **kwargs)
+
+    def Session(self):
+        return self._requests.Session()
+
+class UserAggregate:
+    """Aggregate stage: fold one user's submission stream into bounded counts."""
+
+    def __init__(self, date_range):
+        self.date_range = date_range
+        # Submission counts by date within the tracked window
+        self.submission_counts = defaultdict(int)
+        self.difficulty_counts = {"Easy": 0, "Medium": 0, "Hard": 0}
+        self.question_numbers = set()
+
+    def consume(self, submissions):
+        """Count each submission and pass it through unchanged."""
+        for submission in submissions:
+            # Convert timestamp to date
+            timestamp = submission.get("timestamp")
+            if timestamp:
+                # Convert the timestamp string to an integer
+                timestamp = int(timestamp)
+                # Use UTC-7 for timestamp conversion
+                submission_date = (datetime.fromtimestamp(timestamp, timezone.utc) - timedelta(hours=7)).date()
+                
+                # Only count submissions within our date range
+                if submission_date >= self.date_range[0] and submission_date <= self.date_range[-1]:
+                    self.submission_counts[submission_date] += 1
+                    
+                    # Track difficulty
+                    question = submission.get("question") or {}
+                    difficulty = question.get("difficulty", "Unknown")
+                    if difficulty in self.difficulty_counts:
+                        self.difficulty_counts[difficulty] += 1
+                    
+                    # Track distinct problems (inferred difficulties carry no question number)
+                    problem = submission.get("titleSlug") or question.get("questionFrontendId")
+                    if problem:
+                        self.question_numbers.add(problem)
+            
+            yield submission
+
+    def to_report(self, total_stats=None, streak=None):
+        """Return the per-user report entry for the consumed stream."""
+        user_data = {
+            "stats": {
+                "recent_total": sum(self.submission_counts.values()),
+                "easy": self.difficulty_counts["Easy"],
+                "medium": self.difficulty_counts["Medium"],
+                "hard": self.difficulty_counts["Hard"],
+                "unique": len(self.question_numbers)
+            }
+        }
+        
+        # Add total stats if available
+        if total_stats is not None:
+            user_data["total_stats"] = total_stats
+        
+        if streak is not None:
+            user_data["streak"] = streak
+        
+        return user_data
+
+# Files carried across runs: config key and default path
+STATE_FILES = (
+    ("stats_cache_file", "stats_cache.json"),
+    ("backlog_file", "request_backlog.json"),
+    ("streaks_file", "streaks.json"),
+)
 
 class LeetCodeTracker:
-    def __init__(self, config_file="config.json"):
-        """Initialize the tracker with configuration."""
+    def __init__(self, config_file="config.json", http=None, users=None, clock=None, state_dir=None):
+        """Initialize the tracker with configuration.
+        
+        ``http`` replaces the default pooled ``requests`` client for every
+        request the tracker makes (see ``cassette.py`` for the record/replay
+        clients); trackers given the same client share its connections. ``users``, a
+        list in the config file's ``users`` format, skips loading the roster
+        from the config or Google Sheet, and ``clock`` overrides the current
+        time; together they let stored data be rendered offline. ``state_dir``
+        moves the files carried across runs (stats cache, backlog, streaks and
+        history) into that directory, leaving the configured ones untouched.
+        """
+        self._http = http
+        self._budgeted_http = None
+        # Replay clients pin the clock to the recorded run
+        self.clock = clock or getattr(http, "clock", None) or time.time
+        # Replay clients restore the recorded state into a scratch directory
+        self.state_dir = state_dir or getattr(http, "state_dir", None)
+        
         try:
             with open(config_file, 'r') as f:
                 self.config = json.load(f)
             
+            # Recording clients keep a copy of the state this run starts from
+            snapshot_state = getattr(http, "snapshot_state", None)
+            if snapshot_state is not None:
+                snapshot_state([self.state_path(key, default) for key, default in STATE_FILES])
+            
+            # Per-run request/deadline budget; work it turns away waits in the backlog
+            budget_config = self.config.get("request_budget", {})
+            self.budget = RequestBudget(
+                budget_config.get("max_requests"),
+                budget_config.get("deadline_seconds")
+            )
+            self.backlog = Backlog(self.state_path("backlog_file", "request_backlog.json"))
+            
             # Initialize empty user lists
             self.users = []
             self.user_domains = {}
@@ -29,7 +148,9 @@ class LeetCodeTracker:
             
             # Check if we're using Google Sheets as a source
             users_source = self.config.get("users_source", {})
-            if users_source.get("type") == "google_sheet":
+            if users is not None:
+                self._parse_users_config(users)
+            elif users_source.get("type") == "google_sheet":
                 # Fetch users from Google Sheet
                 self._fetch_users_from_google_sheet(users_source)
             else:
@@ -41,10 +162,22 @@ class LeetCodeTracker:
             
             # New option to enable/disable fetching total stats
             self.fetch_total_stats = self.config.get("fetch_total_stats", True)
+            # Usernames to fetch total stats for, when only some users want them
+            self.stats_users = None
             
             # New option for minimum submissions threshold
             self.min_submissions = self.config.get("min_submissions", 0)
             
+            # Known problem difficulties, plus total stats snapshots (refreshed on
+            # a TTL) whose deltas also stand in for per-problem lookups
+            self.stats_cache = StatsCache(
+                self.state_path("stats_cache_file", "stats_cache.json"),
+                self.config.get("stats_ttl_hours", 6) * 3600
+            )
+            
+            # Streak state carried across runs
+            self.streaks = StreakEngine(self.state_path("streaks_file", "streaks.json"))
+            
             if not self.users:
                 print("Error: No users specified in config file or Google Sheet.")
                 sys.exit(1)
@@ -62,8 +195,27 @@ class LeetCodeTracker:
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
         }
         
+    def state_path(self, key, default=None):
+        """Return the path of a state file or directory configured under ``key``."""
+        path = self.config.get(key, default)
+        if path and self.state_dir is not None:
+            return os.path.join(self.state_dir, os.path.basename(os.path.normpath(path)))
+        return path
+
+    @property
+    def http(self):
+        """HTTP client for all requests; ``requests`` is only imported when first needed."""
+        if self._budgeted_http is None:
+            if self._http is None:
+                self._http = PooledHttp()
+            self._budgeted_http = BudgetedHttp(self._http, self.budget)
+        return self._budgeted_http
+
     def _fetch_users_from_google_sheet(self, users_source):
         """Fetch users from Google Sheet."""
+        import pandas as pd
+        from io import StringIO
+        
         sheet_url = users_source.get("url")
         if not sheet_url:
             print("Error: Google Sheet URL not provided in config.")
@@ -74,7 +226,7 @@ class LeetCodeTracker:
             export_url = sheet_url.replace("/edit?usp=sharing", "/export?format=csv")
             
             # Fetch the CSV content
-            response = requests.get(export_url)
+            response = self.http.get(export_url)
             if response.status_code != 200:
                 print(f"Error fetching Google Sheet: HTTP {response.status_code}")
                 return
@@ -130,27 +282,262 @@ class LeetCodeTracker:
                     self.user_domains[username] = domain
                     self.user_display_names[username] = wx_name
 
+    def pause(self, seconds):
+        """Sleep between requests to avoid rate limiting, unless replaying."""
+        if getattr(self.http, "throttle", True):
+            time.sleep(seconds)
+
     def get_api_url(self, username):
         """Get the appropriate API URL based on user domain."""
         # Only used for non-CN sites now
         return "https://leetcode.com/graphql"
 
+    def iter_roster(self):
+        """Roster stage: yield (username, domain, display name) for every tracked user."""
+        for username in self.users:
+            yield (
+                username,
+                self.user_domains.get(username, "com"),
+                self.user_display_names.get(username, username)
+            )
+
     def get_user_activity(self, username):
         """Fetch a user's recent submissions from LeetCode."""
+        return list(self.iter_user_activity(username))
+
+    def activity_cost(self, username):
+        """Return how many requests fetching a user's activity list takes."""
+        # LeetCode China needs the profile page before the GraphQL call
+        return 2 if self.user_domains.get(username, "com").lower() == "cn" else 1
+
+    def stats_cost(self, username):
+        """Return how many requests a total stats refresh takes."""
+        return self.activity_cost(username)
+
+    def iter_user_activity(self, username):
+        """Fetch and enrich stages: yield a user's recent submissions one at a time."""
         domain = self.user_domains.get(username, "com")
         is_cn = domain.lower() == "cn"
         
+        cost = self.activity_cost(username)
+        if not self.budget.allow(ACTIVITY, domain, cost):
+            print(f"Request budget exhausted, skipping {username}.")
+            self.budget.release(cost)
+            return iter(())
+        
         if is_cn:
-            # Use regular REST API for LeetCode China
-            return self.get_cn_user_activity(username)
+            # LeetCode China needs a cookie session shared by the fetch and enrich stages
+            session = self.http.Session()
+            submissions = self.iter_cn_user_activity(username, session)
         else:
             # Continue using GraphQL for international site
-            return self.get_intl_user_activity(username)
+            session = None
+            submissions = self.iter_intl_user_activity(username)
+        
+        submissions = self._release_activity(submissions, cost)
+        submissions = self.infer_difficulties(username, submissions)
+        return self.enrich_submissions(username, submissions, session)
 
-    def get_cn_user_activity(self, username):
-        """Fetch a user's recent submissions from LeetCode.cn using the correct API endpoint."""
-        # Create a session with cookies
-        session = requests.Session()
+    def _release_activity(self, submissions, cost):
+        """Return a user's activity reservation as soon as their list has been fetched."""
+        submissions = iter(submissions)
+        first = next(submissions, None)
+        self.budget.release(cost)
+        if first is not None:
+            yield first
+            yield from submissions
+
+    def infer_difficulties(self, username, submissions):
+        """Fill in difficulties from the problem cache and stats deltas before enrichment.
+        
+        The user's submissions are buffered (one activity response at most). If
+        new problems still need a lookup (two or more, or any once the snapshot
+        is past its TTL), a single stats request replaces those lookups whenever
+        the delta explains the new problems unambiguously. Refreshes that would
+        replace no lookups are left to ``collect_total_stats``.
+        """
+        domain = self.user_domains.get(username, "com")
+        submissions = list(submissions)
+        
+        for submission in submissions:
+            difficulty = self.stats_cache.get_difficulty(f"{domain}:{submission.get('titleSlug')}")
+            if difficulty:
+                question = submission.setdefault("question", {})
+                question["difficulty"] = difficulty
+        
+        user_key = f"{domain}:{username}"
+        snapshot = self.stats_cache.get_snapshot(user_key)
+        if not self.wants_total_stats(username) or snapshot is None:
+            yield from submissions
+            return
+        
+        since = snapshot["fetched_at"]
+        timestamps = [int(s["timestamp"]) for s in submissions if s.get("timestamp")]
+        new_submissions = [
+            s for s in submissions
+            if s.get("titleSlug") and s.get("timestamp") and int(s["timestamp"]) > since
+        ]
+        unresolved = {
+            s["titleSlug"] for s in new_submissions
+            if (s.get("question") or {}).get("difficulty") not in DIFFICULTIES
+        }
+        
+        now = self.clock()
+        if not unresolved or (self.stats_cache.is_fresh(snapshot, now) and len(unresolved) < 2):
+            yield from submissions
+            return
+        
+        # This refresh stands in for difficulty lookups, so it is enrichment work
+        if not self.budget.allow(ENRICH, domain, self.stats_cost(username)):
+            yield from submissions
+            return
+        
+        stats = self.refresh_total_stats(username)
+        if stats is not None:
+            # The activity list must reach back past the snapshot (or be shorter
+            # than the request limit) so no counted solve can be hidden
+            covers_snapshot = any(ts <= since for ts in timestamps) or (
+                domain.lower() != "cn" and len(submissions) < self.get_activity_limit()
+            )
+            new_slugs = {s["titleSlug"] for s in new_submissions}
+            difficulty = infer_difficulty(snapshot, stats, new_slugs, covers_snapshot)
+            if difficulty:
+                for submission in new_submissions:
+                    question = submission.setdefault("question", {})
+                    question["difficulty"] = difficulty
+                    self.stats_cache.put_difficulty(f"{domain}:{submission['titleSlug']}", difficulty)
+        
+        yield from submissions
+
+    def enrich_submissions(self, username, submissions, session=None):
+        """Enrich stage: attach problem difficulty to each submission as it streams past."""
+        domain = self.user_domains.get(username, "com")
+        for submission in submissions:
+            title_slug = submission.get("titleSlug")
+            known = (submission.get("question") or {}).get("difficulty") in DIFFICULTIES
+            if title_slug and not known:
+                if not self.budget.allow(ENRICH, domain):
+                    # Left as Unknown for now and looked up first thing next run
+                    self.backlog.defer_problem(domain, title_slug, username)
+                elif session is not None:
+                    problem_data = self.get_cn_problem_data(title_slug, session)
+                    submission["question"]["difficulty"] = problem_data.get("difficulty", "Unknown")
+                    self.pause(0.3)  # Short delay to avoid rate limiting
+                else:
+                    submission["question"] = self.get_problem_data(title_slug, username)
+                    self.pause(0.5)
+                difficulty = (submission.get("question") or {}).get("difficulty")
+                self.stats_cache.put_difficulty(f"{domain}:{title_slug}", difficulty)
+                if difficulty not in DIFFICULTIES and domain in self.budget.throttled:
+                    # The lookup itself was rate limited
+                    self.backlog.defer_problem(domain, title_slug, username)
+            yield submission
+
+    def drain_backlog(self):
+        """Retry difficulty lookups deferred by earlier runs, within this run's budget.
+        
+        Results land in the problem cache, where this run's enrich stage picks
+        them up. An item leaves the backlog only once its difficulty is known;
+        lookups the budget turns away, or that fail, stay for the next run.
+        """
+        session = None
+        for item in self.backlog.pending_problems():
+            domain, slug = item["domain"], item["slug"]
+            if self.stats_cache.get_difficulty(f"{domain}:{slug}"):
+                self.backlog.resolve_problem(domain, slug)
+                continue
+            if not self.budget.allow(ENRICH, domain):
+                continue
+            if domain.lower() == "cn":
+                if session is None:
+                    session = self.http.Session()
+                problem_data = self.get_cn_problem_data(slug, session)
+                self.pause(0.3)
+            else:
+                problem_data = self.get_problem_data(slug, item["username"])
+                self.pause(0.5)
+            difficulty = (problem_data or {}).get("difficulty")
+            if difficulty in DIFFICULTIES:
+                self.stats_cache.put_difficulty(f"{domain}:{slug}", difficulty)
+                self.backlog.resolve_problem(domain, slug)
+
+    def start_run(self):
+        """Reserve budget for every user's activity list, then work off the backlog."""
+        self.budget.reserve(sum(self.activity_cost(username) for username in self.users))
+        self.drain_backlog()
+
+    def finish_run(self):
+        """Persist caches and the backlog, and report any deferred work."""
+        self.stats_cache.save()
+        self.backlog.save()
+        if len(self.backlog):
+            print(f"Deferred {len(self.backlog.problems)} difficulty lookups and "
+                  f"{len(self.backlog.stats)} stats refreshes to the next run "
+                  f"({self.budget.used} requests used).")
+
+    def collect_total_stats(self, source=None):
+        """Final stage: total stats for every user, keyed by username.
+        
+        Runs after all activity and enrichment, so stats refreshes (the lowest
+        priority) only ever get the budget that work left over.
+        """
+        if not self.fetch_total_stats:
+            return {}
+        source = source or self
+        return {
+            username: source.get_total_stats(username)
+            for username, _, _ in self.iter_roster()
+            if self.wants_total_stats(username)
+        }
+
+    def wants_total_stats(self, username):
+        """Return True if total stats are tracked for a user."""
+        if self.stats_users is not None:
+            return username in self.stats_users
+        return self.fetch_total_stats
+
+    def get_total_stats(self, username):
+        """Return a user's total stats, refetching only when the snapshot is past its TTL.
+        
+        Refreshes the budget cannot fit are deferred, and the last snapshot is
+        shown in the meantime.
+        """
+        domain = self.user_domains.get(username, "com")
+        user_key = f"{domain}:{username}"
+        snapshot = self.stats_cache.get_snapshot(user_key)
+        if user_key in self.backlog.stats or not self.stats_cache.is_fresh(snapshot, self.clock()):
+            stats = None
+            if self.budget.allow(STATS, domain, self.stats_cost(username)):
+                stats = self.refresh_total_stats(username)
+                # Avoid hitting rate limits
+                self.pause(1)
+            if stats is not None:
+                return stats
+            self.backlog.defer_stats(user_key)
+        if snapshot is None:
+            return {"Easy": 0, "Medium": 0, "Hard": 0, "Total": 0}
+        return {key: snapshot[key] for key in DIFFICULTIES + ("Total",)}
+
+    def refresh_total_stats(self, username):
+        """Fetch a user's total stats and store them as the new snapshot.
+        
+        Returns None when the fetch looks failed (rate limited, or counts below
+        the previous snapshot), keeping the old snapshot in place.
+        """
+        domain = self.user_domains.get(username, "com")
+        user_key = f"{domain}:{username}"
+        stats = self.get_user_stats(username)
+        if domain in self.budget.throttled:
+            return None
+        snapshot = self.stats_cache.get_snapshot(user_key)
+        if snapshot is not None and stats["Total"] < snapshot["Total"]:
+            return None
+        self.stats_cache.put_snapshot(user_key, stats, self.clock())
+        self.backlog.clear_stats(user_key)
+        return stats
+
+    def iter_cn_user_activity(self, username, session):
+        """Yield a user's recent submissions from LeetCode.cn using the correct API endpoint."""
         profile_url = f"https://leetcode.cn/u/{username}/"
         
         # Set up headers for browser simulation
@@ -167,7 +554,7 @@ class LeetCodeTracker:
             profile_response = session.get(profile_url, headers=headers)
             if profile_response.status_code != 200:
                 print(f"Failed to access profile page for {username}: HTTP {profile_response.status_code}")
-                return []
+                return
             
             # Check if we can extract CSRF token from the page
             csrf_token = None
@@ -219,7 +606,6 @@ class LeetCodeTracker:
                 submissions = data.get("data", {}).get("recentACSubmissions", [])
                 
                 # Convert to our standard format
-                ac_submissions = []
                 for s in submissions:
                     question = s.get("question", {})
                     
@@ -231,38 +617,28 @@ class LeetCodeTracker:
                         submission_date = (datetime.fromtimestamp(timestamp, timezone.utc) - timedelta(hours=7)).date()
                         
                         # If the submission date is too old, skip it
-                        today = get_utc7_now().date()
+                        today = get_utc7_now(self.clock()).date()
                         if (today - submission_date).days > self.days_to_track:
                             continue
                     
-                    # Get problem difficulty separately
-                    title_slug = question.get("titleSlug")
-                    problem_data = {"difficulty": "Unknown"}
-                    if title_slug:
-                        problem_data = self.get_cn_problem_data(title_slug, session)
-                        time.sleep(0.3)  # Short delay to avoid rate limiting
-                    
-                    ac_submissions.append({
+                    # Difficulty is filled in later by the enrich stage
+                    yield {
                         "id": s.get("submissionId"),
                         "title": question.get("title") or question.get("translatedTitle"),
-                        "titleSlug": title_slug,
+                        "titleSlug": question.get("titleSlug"),
                         "timestamp": timestamp,
                         "question": {
                             "questionFrontendId": question.get("questionFrontendId"),
-                            "difficulty": problem_data.get("difficulty", "Unknown")
+                            "difficulty": "Unknown"
                         }
-                    })
-                
-                return ac_submissions
+                    }
                 
             else:
                 print(f"GraphQL request failed for {username}: HTTP {graphql_response.status_code}")
                 print(f"Response: {graphql_response.text[:500]}...")
-                return []
                 
         except Exception as e:
             print(f"Error fetching data for {username}: {str(e)}")
-            return []
 
     def get_cn_problem_data(self, title_slug, session):
         """Fetch problem difficulty and ID for a given problem from LeetCode.cn."""
@@ -306,8 +682,8 @@ class LeetCodeTracker:
         # Return default values if we couldn't extract the data
         return {"questionFrontendId": "", "difficulty": "Unknown"}
 
-    def get_intl_user_activity(self, username):
-        """Fetch a user's recent submissions from LeetCode.com using GraphQL."""
+    def iter_intl_user_activity(self, username):
+        """Yield a user's recent submissions from LeetCode.com using GraphQL."""
         query = """
         query recentAcSubmissions($username: String!, $limit: Int!) {
           recentAcSubmissionList(username: $username, limit: $limit) {
@@ -319,7 +695,7 @@ class LeetCodeTracker:
         }
         """
         
-        limit = self.days_to_track * 10
+        limit = self.get_activity_limit()
         variables = {
             "username": username,
             "limit": limit
@@ -327,7 +703,7 @@ class LeetCodeTracker:
         
         try:
             api_url = self.get_api_url(username)
-            response = requests.post(
+            response = self.http.post(
                 api_url,
                 json={"query": query, "variables": variables},
                 headers=self.headers
@@ -337,23 +713,18 @@ class LeetCodeTracker:
                 data = response.json()
                 submissions = data.get("data", {}).get("recentAcSubmissionList", [])
                 
-                # Enhance submissions with difficulty data
-                for submission in submissions:
-                    title_slug = submission.get("titleSlug")
-                    if title_slug:
-                        problem_data = self.get_problem_data(title_slug, username)
-                        submission["question"] = problem_data
-                        time.sleep(0.5)
-                
-                return submissions
+                # Difficulty is filled in later by the enrich stage
+                yield from submissions
             else:
                 print(f"Error fetching data for {username}: HTTP {response.status_code}")
                 print(f"Response: {response.text[:500]}...")
-                return []
                 
         except Exception as e:
             print(f"Error fetching data for {username}: {str(e)}")
-            return []
+
+    def get_activity_limit(self):
+        """Return how many recent submissions to request from LeetCode.com."""
+        return self.days_to_track * 10
 
     def get_problem_data(self, title_slug, username):
         """Fetch problem difficulty and ID for a given problem."""
@@ -393,7 +764,7 @@ class LeetCodeTracker:
                 headers["Origin"] = "https://leetcode.cn"
                 headers["Accept-Language"] = "zh-CN,zh;q=0.9,en;q=0.8"
             
-            response = requests.post(
+            response = self.http.post(
                 api_url,
                 json={"query": query, "variables": variables},
                 headers=headers
@@ -416,132 +787,142 @@ class LeetCodeTracker:
             print(f"Problem data fetch error: {str(e)}")
             return {}
     
-    def generate_report(self):
-        """Generate a report of daily submission counts for all users."""
+    def generate_report(self, sink=None, source=None):
+        """Generate a report of daily submission counts for all users.
+        
+        Submissions stream through the roster, fetch, enrich and aggregate
+        stages one at a time and are handed to ``sink.write(username, domain,
+        submission)`` as they arrive, so only per-user counts are kept in memory.
+        Total stats are collected last, once every user's activity is in.
+        
+        ``source`` replaces the fetch and enrich stages with anything providing
+        ``iter_user_activity(username)`` and ``get_total_stats(username)``, such
+        as ``raw_data.RawDataReader`` for offline rendering.
+        """
+        offline = source is not None
+        source = source or self
+        
         # Get current date and calculate date range
-        today = get_utc7_now().date()
+        today = get_utc7_now(self.clock()).date()
         date_range = [today - timedelta(days=i) for i in range(self.days_to_track)]
         date_range.reverse()  # Oldest to newest
         
-        # Dictionary to store submission counts by user, date and difficulty
-        submission_counts = defaultdict(lambda: defaultdict(int))
-        difficulty_counts = defaultdict(lambda: {"Easy": 0, "Medium": 0, "Hard": 0})
-        question_numbers = defaultdict(set)
-        total_stats = {}
+        # Per-user aggregates and streaks keyed by username
+        aggregates = {}
+        streaks = {}
+        
+        if not offline:
+            self.start_run()
         
         # Fetch and process data for each user
-        for username in self.users:
-            print(f"Fetching data for {username}...")
+        for username, domain, _ in self.iter_roster():
+            if not offline:
+                print(f"Fetching data for {username}...")
             
-            # Get total stats first (if enabled)
-            if self.fetch_total_stats:
-                user_stats = self.get_user_stats(username)
-                total_stats[username] = user_stats
-            
-            # Then get recent submissions
-            submissions = self.get_user_activity(username)
-            
-            for submission in submissions:
-                # Convert timestamp to date
-                timestamp = submission.get("timestamp")
-                if timestamp:
-                    # Convert the timestamp string to an integer
-                    timestamp = int(timestamp)
-                    # Use UTC-7 for timestamp conversion
-                    submission_date = (datetime.fromtimestamp(timestamp, timezone.utc) - timedelta(hours=7)).date()
-                    
-                    # Only count submissions within our date range
-                    if submission_date >= date_range[0] and submission_date <= date_range[-1]:
-                        submission_counts[username][submission_date] += 1
-                        
-                        # Track difficulty
-                        difficulty = submission.get("question", {}).get("difficulty", "Unknown")
-                        if difficulty in ["Easy", "Medium", "Hard"]:
-                            difficulty_counts[username][difficulty] += 1
-                        
-                        # Track question numbers
-                        question_id = submission.get("question", {}).get("questionFrontendId")
-                        if question_id:
-                            question_numbers[username].add(question_id)
+            # Stream recent submissions through the aggregate stage into the sink
+            aggregate = UserAggregate(date_range)
+            for submission in aggregate.consume(source.iter_user_activity(username)):
+                if sink is not None:
+                    sink.write(username, domain, submission)
+            aggregates[username] = aggregate
+            
+            # Extend streaks with the active days in the window
+            streaks[username] = self.streaks.update(f"{domain}:{username}", aggregate.submission_counts, today)
             
             # Avoid hitting rate limits
-            time.sleep(1)
+            if not offline:
+                self.pause(1)
         
-        # Prepare the report data to return
-        report_data = {}
-        for username in self.users:
-            user_data = {
-                "submissions": [],
-                "stats": {
-                    "recent_total": sum(submission_counts[username].values()),
-                    "easy": difficulty_counts[username]["Easy"],
-                    "medium": difficulty_counts[username]["Medium"],
-                    "hard": difficulty_counts[username]["Hard"],
-                    "unique": len(question_numbers[username])
-                }
-            }
+        # Then get total stats (if enabled), possibly refreshed during inference
+        total_stats = self.collect_total_stats(source)
+        report_data = {
+            username: aggregate.to_report(total_stats.get(username), streaks[username])
+            for username, aggregate in aggregates.items()
+        }
+        
+        if not offline:
+            self.finish_run()
+        self.streaks.save()
+        
+        self.print_report(report_data, today)
+        
+        # Return the report data
+        return report_data
+
+    def fetch(self, sink):
+        """Run only the network stages, streaming raw data to ``sink``.
+        
+        Each user's submissions go to ``sink.write(username, domain,
+        submission)``, followed by ``sink.write_user(username, domain,
+        display_name)``. Total stats follow once every user is done, through
+        ``sink.write_stats(username, domain, total_stats)``. Nothing is
+        aggregated or printed, so the output can be rendered later with
+        ``generate_report(source=...)``.
+        """
+        self.start_run()
+        
+        for username, domain, display_name in self.iter_roster():
+            print(f"Fetching data for {username}...")
             
-            # Add total stats if available
-            if self.fetch_total_stats and username in total_stats:
-                user_data["total_stats"] = total_stats[username]
-                
-            # Add all submissions data
-            domain = self.user_domains.get(username, "com")
-            submissions = self.get_user_activity(username)
-            user_data["submissions"] = submissions
+            for submission in self.iter_user_activity(username):
+                sink.write(username, domain, submission)
+            sink.write_user(username, domain, display_name)
             
-            report_data[username] = user_data
+            # Avoid hitting rate limits
+            self.pause(1)
+        
+        for username, user_stats in self.collect_total_stats().items():
+            sink.write_stats(username, self.user_domains.get(username, "com"), user_stats)
+        
+        self.finish_run()
+
+    def print_report(self, report_data, today):
+        """Print the console table for aggregated report data."""
+        from tabulate import tabulate
         
         # Handle the case when no submissions are found
-        if not any(submission_counts.values()):
+        if not any(user_data["stats"]["recent_total"] for user_data in report_data.values()):
             print("\nLeetCode Submission Report\n")
             print(f"Report Date: {today.strftime('%Y-%m-%d')} (UTC-7)")
             print("No submissions found in the specified date range.")
-            print(f"\nReport generated on: {get_utc7_now().strftime('%Y-%m-%d %H:%M:%S')} (UTC-7)")
-            return report_data
+            print(f"\nReport generated on: {get_utc7_now(self.clock()).strftime('%Y-%m-%d %H:%M:%S')} (UTC-7)")
+            return
         
         # Define headers based on whether total stats are included
         if self.fetch_total_stats:
-            headers = ["User", "Recent", "Easy", "Medium", "Hard", "Unique", "Total Solved", "E", "M", "H"]
+            headers = ["User", "Recent", "Easy", "Medium", "Hard", "Unique", "Streak", "Best", "Active", "Total Solved", "E", "M", "H"]
         else:
-            headers = ["User", "Recent", "Easy", "Medium", "Hard", "Unique"]
+            headers = ["User", "Recent", "Easy", "Medium", "Hard", "Unique", "Streak", "Best", "Active"]
         
         main_rows = []
         below_threshold_rows = []
         
         for username in self.users:
-            user_total = sum(submission_counts[username].values())
-            easy_count = difficulty_counts[username]["Easy"]
-            medium_count = difficulty_counts[username]["Medium"]
-            hard_count = difficulty_counts[username]["Hard"]
-            unique_problems = len(question_numbers[username])
+            stats = report_data[username]["stats"]
+            streak = report_data[username]["streak"]
+            user_total = stats["recent_total"]
+            
+            row = [
+                username, 
+                user_total, 
+                stats["easy"], 
+                stats["medium"], 
+                stats["hard"], 
+                stats["unique"],
+                streak["current"],
+                streak["longest"],
+                streak["active_days"]
+            ]
             
-            # Create row with or without total stats
+            # Add total stats if enabled
             if self.fetch_total_stats:
-                # Add total stats
-                user_stats = total_stats.get(username, {"Total": 0, "Easy": 0, "Medium": 0, "Hard": 0})
-                
-                row = [
-                    username, 
-                    user_total, 
-                    easy_count, 
-                    medium_count, 
-                    hard_count, 
-                    unique_problems,
+                user_stats = report_data[username].get("total_stats") or {"Total": 0, "Easy": 0, "Medium": 0, "Hard": 0}
+                row += [
                     user_stats["Total"],
                     user_stats["Easy"],
                     user_stats["Medium"],
                     user_stats["Hard"]
                 ]
-            else:
-                row = [
-                    username, 
-                    user_total, 
-                    easy_count, 
-                    medium_count, 
-                    hard_count, 
-                    unique_problems
-                ]
             
             # Separate users who meet the threshold from those who don't
             if user_total >= self.min_submissions:
@@ -571,11 +952,9 @@ class LeetCodeTracker:
             print("\nRecent = Submissions in tracked period | E/M/H = Total problems by difficulty")
         else:
             print("\nOnly showing recent submissions in the tracked period")
+        print("Streak/Best = Consecutive days with submissions | Active = Days with submissions in tracked period")
         
-        print(f"\nReport generated on: {get_utc7_now().strftime('%Y-%m-%d %H:%M:%S')} (UTC-7)")
-        
-        # Return the report data
-        return report_data
+        print(f"\nReport generated on: {get_utc7_now(self.clock()).strftime('%Y-%m-%d %H:%M:%S')} (UTC-7)")
 
     def get_user_stats(self, username):
         """Fetch a user's total statistics (accepted problems by difficulty)."""
@@ -609,7 +988,7 @@ class LeetCodeTracker:
         
         try:
             api_url = self.get_api_url(username)
-            response = requests.post(
+            response = self.http.post(
                 api_url,
                 json={"query": query, "variables": variables},
                 headers=self.headers
@@ -655,7 +1034,7 @@ class LeetCodeTracker:
     def get_cn_user_stats(self, username):
         """Fetch total statistics for LeetCode.cn users."""
         # Create a session with cookies
-        session = requests.Session()
+        session = self.http.Session()
         profile_url = f"https://leetcode.cn/u/{username}/"
         
         headers = {
@@ -772,5 +1151,17 @@ class LeetCodeTracker:
             return {"Easy": 0, "Medium": 0, "Hard": 0, "Total": 0}
 
 if __name__ == "__main__":
-    tracker = LeetCodeTracker()
-    tracker.generate_report() 
\ No newline at end of file
+    import argparse
+    from cassette import add_cassette_arguments, http_from_args
+    
+    parser = argparse.ArgumentParser(description="Print a LeetCode submission report.")
+    add_cassette_arguments(parser)
+    args = parser.parse_args()
+    
+    http = http_from_args(args)
+    try:
+        tracker = LeetCodeTracker(http=http)
+        tracker.generate_report()
+    finally:
+        if http is not None:
+            http.close()
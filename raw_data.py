@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Raw fetch output, stored as NDJSON so it can be rendered offline.
+
+The first line is a ``meta`` record with the fetch time. Each user's
+submissions follow as ``submission`` records, closed by that user's ``user``
+record (domain, display name and, for multi-cohort fetches, the cohorts the
+user belongs to with their display name in each). Users appear in roster
+order, so the reader can stream every user's submissions in a single forward
+pass. Total stats are fetched last and close the file as ``stats`` records.
+"""
+import json
+import os
+
+RAW_DATA_VERSION = 1
+
+class RawDataWriter:
+    """Fetch sink: stream raw submissions and per-user records to an NDJSON file."""
+
+    def __init__(self, path, timestamp, membership=None):
+        self.path = path
+        self.timestamp = int(timestamp)
+        # username -> {cohort name: display name}
+        self.membership = membership or {}
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        # Write to a temporary file so a failed fetch keeps the previous data
+        self._file = open(self.path + ".tmp", "w")
+        self._write({"type": "meta", "version": RAW_DATA_VERSION, "timestamp": self.timestamp})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        if exc_type is None:
+            os.replace(self.path + ".tmp", self.path)
+        else:
+            os.remove(self.path + ".tmp")
+        return False
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+
+    def write(self, username, domain, submission):
+        self._write({"type": "submission", "username": username, "domain": domain, "submission": submission})
+        self.count += 1
+
+    def write_user(self, username, domain, display_name):
+        self._write({
+            "type": "user",
+            "username": username,
+            "domain": domain,
+            "display_name": display_name,
+            "cohorts": self.membership.get(username)
+        })
+
+    def write_stats(self, username, domain, total_stats):
+        self._write({"type": "stats", "username": username, "domain": domain, "total_stats": total_stats})
+
+class RawDataReader:
+    """Serve stored raw data back to ``LeetCodeTracker.generate_report`` as its source.
+
+    Opening the file reads only the ``user`` and ``stats`` records to build the
+    roster; submissions are parsed lazily as ``iter_user_activity`` walks the
+    file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.users = []
+        self.total_stats = {}
+        self.membership = {}
+        self._file = None
+        with open(path, "r") as f:
+            meta = json.loads(f.readline())
+            if meta.get("type") != "meta" or meta.get("version") != RAW_DATA_VERSION:
+                raise ValueError(f"'{path}' is not a raw data file from this version of the tracker")
+            self.timestamp = meta["timestamp"]
+            for line in f:
+                # Records are written with "type" first, so user lines can be picked out unparsed
+                if line.startswith('{"type": "stats"'):
+                    record = json.loads(line)
+                    self.total_stats[record["username"]] = record["total_stats"]
+                    continue
+                if not line.startswith('{"type": "user"'):
+                    continue
+                record = json.loads(line)
+                self.users.append({
+                    "username": record["username"],
+                    "domain": record["domain"],
+                    "wx_name": record["display_name"]
+                })
+                if record.get("cohorts"):
+                    self.membership[record["username"]] = record["cohorts"]
+
+    def users_for(self, cohort):
+        """Return the users of one cohort, in file order, with that cohort's display names.
+
+        Files fetched without cohort information hold a single cohort, so every
+        user is returned.
+        """
+        if not self.membership:
+            return list(self.users)
+        return [
+            {**user, "wx_name": self.membership[user["username"]][cohort]}
+            for user in self.users
+            if cohort in self.membership.get(user["username"], {})
+        ]
+
+    def clock(self):
+        """Return the fetch time, in epoch seconds."""
+        return self.timestamp
+
+    def iter_user_activity(self, username):
+        """Yield a user's stored submissions; users must be requested in roster order."""
+        if self._file is None:
+            self._file = open(self.path, "r")
+            self._file.readline()
+        for line in self._file:
+            record = json.loads(line)
+            if record["type"] == "user":
+                if record["username"] == username:
+                    return
+            elif record["type"] == "submission" and record["username"] == username:
+                yield record["submission"]
+
+    def get_total_stats(self, username):
+        return self.total_stats.get(username)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Persisted per-user stats snapshots and the difficulty inference built on them.
+
+Each snapshot is a user's ``Easy/Medium/Hard/Total`` accepted counts and the
+time they were fetched. Comparing a fresh snapshot with the previous one tells
+how many new problems of each difficulty a user solved in between; when that
+delta accounts for exactly the new submissions, their difficulties follow
+without any per-problem lookups.
+"""
+import json
+import os
+
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+class StatsCache:
+    """JSON-backed store of stats snapshots and known problem difficulties."""
+
+    def __init__(self, path, ttl_seconds):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.snapshots = {}
+        self.problems = {}
+        self._dirty = False
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self.snapshots = data.get("snapshots", {})
+            self.problems = data.get("problems", {})
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError:
+            print(f"Warning: stats cache '{path}' is not valid JSON, starting empty.")
+
+    def get_snapshot(self, key):
+        """Return the last snapshot for a user key, or None."""
+        return self.snapshots.get(key)
+
+    def is_fresh(self, snapshot, now):
+        """Return True if a snapshot is younger than the TTL."""
+        return snapshot is not None and now - snapshot["fetched_at"] < self.ttl_seconds
+
+    def put_snapshot(self, key, stats, now):
+        self.snapshots[key] = {**stats, "fetched_at": now}
+        self._dirty = True
+
+    def get_difficulty(self, key):
+        return self.problems.get(key)
+
+    def put_difficulty(self, key, difficulty):
+        if difficulty in DIFFICULTIES and self.problems.get(key) != difficulty:
+            self.problems[key] = difficulty
+            self._dirty = True
+
+    def save(self):
+        """Write the cache back to disk if anything changed, or if it does not exist yet."""
+        if not self._dirty and os.path.exists(self.path):
+            return
+        with open(self.path + ".tmp", 'w') as f:
+            json.dump({"snapshots": self.snapshots, "problems": self.problems}, f, indent=2, sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
+        self._dirty = False
+
+def stats_delta(old, new):
+    """Return the per-difficulty increase between two snapshots, or None if counts went down."""
+    delta = {key: new.get(key, 0) - old.get(key, 0) for key in DIFFICULTIES + ("Total",)}
+    if any(count < 0 for count in delta.values()):
+        return None
+    return delta
+
+def infer_difficulty(old, new, new_slugs, covers_snapshot):
+    """Return the single difficulty explaining ``new_slugs``, or None if ambiguous.
+
+    ``new_slugs`` are the distinct problems accepted since ``old`` was taken and
+    ``covers_snapshot`` says whether the fetched activity list reaches back past
+    that time, so no solves can be hidden beyond its end. The answer is only
+    unambiguous when one difficulty grew by exactly the number of new problems
+    and nothing else changed.
+    """
+    if not new_slugs or not covers_snapshot:
+        return None
+    delta = stats_delta(old, new)
+    if delta is None:
+        return None
+    grown = [difficulty for difficulty in DIFFICULTIES if delta[difficulty]]
+    if len(grown) != 1:
+        return None
+    difficulty = grown[0]
+    if delta[difficulty] != len(new_slugs) or delta["Total"] != len(new_slugs):
+        return None
+    return difficulty
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Daily practice streaks.
+
+``StreakEngine`` keeps, per user (keyed ``domain:username`` like the stats
+cache and backlog), the last active day, the length of the run ending on it
+and the longest run seen. Each run of the tracker feeds it the
+active days from ``generate_report``'s per-day buckets; every new day is an
+O(1) update. ``compute_streaks`` recomputes the same numbers for a whole
+history at once and backs the ``backfill`` path.
+
+Backfill from the Parquet history with ``python streaks.py --history history``.
+"""
+import argparse
+import json
+import os
+from datetime import date, timedelta
+
+class StreakEngine:
+    """JSON-backed per-user streak state with O(1) incremental updates."""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        try:
+            with open(path, 'r') as f:
+                self.state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError:
+            print(f"Warning: streak file '{path}' is not valid JSON, starting empty.")
+
+    def observe(self, user_key, day):
+        """Record that a user was active on ``day``."""
+        entry = self.state.get(user_key)
+        if entry is None:
+            self.state[user_key] = {"last_active": day.isoformat(), "run": 1, "longest": 1}
+            return
+        last_active = date.fromisoformat(entry["last_active"])
+        if day <= last_active:
+            # Already counted, or older than what we track; backfill handles gaps
+            return
+        entry["run"] = entry["run"] + 1 if day == last_active + timedelta(days=1) else 1
+        entry["last_active"] = day.isoformat()
+        entry["longest"] = max(entry["longest"], entry["run"])
+
+    def update(self, user_key, submission_counts, today):
+        """Feed one user's per-day counts for the window and return their streak summary."""
+        active = sorted(day for day, count in submission_counts.items() if count)
+        for day in active:
+            self.observe(user_key, day)
+        return {**self.summary(user_key, today), "active_days": len(active)}
+
+    def summary(self, user_key, today):
+        """Return the current and longest streak for a user as of ``today``."""
+        entry = self.state.get(user_key)
+        if entry is None:
+            return {"current": 0, "longest": 0}
+        # Today's streak is still alive until the day is over
+        alive = date.fromisoformat(entry["last_active"]) >= today - timedelta(days=1)
+        return {"current": entry["run"] if alive else 0, "longest": entry["longest"]}
+
+    def backfill(self, days, today):
+        """Replace the state of every user in ``days`` (columns domain, username, date) in one pass."""
+        table = compute_streaks(with_user_keys(days), today)
+        for user_key, row in table.iterrows():
+            self.state[user_key] = {
+                "last_active": row["last_active"],
+                "run": int(row["latest_run"]),
+                "longest": int(row["longest"])
+            }
+        return table
+
+    def save(self):
+        with open(self.path + ".tmp", 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
+
+def with_user_keys(days):
+    """Replace ``username`` with the ``domain:username`` key the streak state uses."""
+    return days.assign(username=days["domain"] + ":" + days["username"])
+
+def compute_streaks(days, today):
+    """Return current, longest and latest-run streaks per user, vectorized.
+
+    ``days`` is a DataFrame with ``username`` and ``date`` columns; duplicate
+    rows (several submissions on one day) are fine.
+    """
+    import pandas as pd
+
+    days = (
+        days[["username", "date"]]
+        .assign(date=pd.to_datetime(days["date"]))
+        .drop_duplicates()
+        .sort_values(["username", "date"])
+        .reset_index(drop=True)
+    )
+    # A new run starts whenever the user changes or a day was skipped
+    new_run = (days["username"] != days["username"].shift()) | (days["date"].diff() != pd.Timedelta(days=1))
+    days["run"] = new_run.cumsum()
+    runs = days.groupby(["username", "run"]).agg(length=("date", "size"), last=("date", "max"))
+    per_user = runs.groupby("username")
+    latest = per_user.tail(1).droplevel("run")
+    # The latest run still counts as current if it reached today or yesterday
+    alive = latest["last"] >= pd.Timestamp(today) - pd.Timedelta(days=1)
+    table = pd.DataFrame({
+        "current": latest["length"].where(alive, 0),
+        "longest": per_user["length"].max(),
+        "active_days": days.groupby("username").size(),
+        "last_active": latest["last"].dt.strftime("%Y-%m-%d"),
+        "latest_run": latest["length"]
+    })
+    return table.sort_values(["current", "longest"], ascending=False)
+
+if __name__ == "__main__":
+    from history import UTC_MINUS_7, load_submissions
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description="Recompute streak state from the Parquet history.")
+    parser.add_argument("--history", default="history", help="history directory (default: history)")
+    parser.add_argument("--state", default="streaks.json", help="streak state file (default: streaks.json)")
+    args = parser.parse_args()
+
+    engine = StreakEngine(args.state)
+    table = engine.backfill(load_submissions(args.history), datetime.now(UTC_MINUS_7).date())
+    engine.save()
+    print(f"Backfilled streaks for {len(table)} users into '{args.state}'.")
@@ -0,0 +1,194 @@
+"""Tests for the request budget, the backlog and the order requests are sent in."""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from budget import ACTIVITY, ENRICH, STATS, Backlog, RequestBudget
+from leetcode_tracker import LeetCodeTracker
+
+COM = "https://leetcode.com/graphql"
+
+class RequestBudgetTest(unittest.TestCase):
+    def test_reservation_is_kept_for_activity(self):
+        budget = RequestBudget(max_requests=3)
+        budget.reserve(2)
+        self.assertTrue(budget.allow(ENRICH, "com"))
+        budget.record(COM, 200)
+        # One request used and two reserved: nothing left for lower priorities
+        self.assertFalse(budget.allow(ENRICH, "com"))
+        self.assertFalse(budget.allow(STATS, "com"))
+        self.assertTrue(budget.allow(ACTIVITY, "com"))
+        budget.release(1)
+        self.assertTrue(budget.allow(STATS, "com"))
+        self.assertEqual(budget.denied, 2)
+
+    def test_request_limit_stops_everything(self):
+        budget = RequestBudget(max_requests=1)
+        budget.record(COM, 200)
+        self.assertFalse(budget.allow(ACTIVITY, "com"))
+
+    def test_deadline(self):
+        with mock.patch("budget.time.monotonic", return_value=100.0):
+            budget = RequestBudget(deadline_seconds=10)
+        with mock.patch("budget.time.monotonic", return_value=104.0):
+            # Two requests in four seconds: three more reserved ones would take six
+            budget.record(COM, 200)
+            budget.record(COM, 200)
+            budget.reserve(2)
+            self.assertTrue(budget.allow(ENRICH, "com"))
+            budget.reserve(3)
+            self.assertFalse(budget.allow(ENRICH, "com"))
+            self.assertTrue(budget.allow(ACTIVITY, "com"))
+        with mock.patch("budget.time.monotonic", return_value=110.0):
+            self.assertFalse(budget.allow(ACTIVITY, "com"))
+
+    def test_rate_limited_site_defers_lower_priorities(self):
+        budget = RequestBudget()
+        with contextlib.redirect_stdout(io.StringIO()):
+            budget.record(COM, 429)
+        self.assertEqual(budget.throttled, {"com"})
+        self.assertFalse(budget.allow(ENRICH, "com"))
+        self.assertFalse(budget.allow(STATS, "com"))
+        self.assertTrue(budget.allow(ACTIVITY, "com"))
+        self.assertTrue(budget.allow(ENRICH, "cn"))
+
+class BacklogTest(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, "request_backlog.json")
+            backlog = Backlog(path)
+            backlog.defer_problem("com", "two-sum", "alice")
+            backlog.defer_problem("com", "two-sum", "bob")
+            backlog.defer_problem("cn", "two-sum", "carol")
+            backlog.defer_stats("com:alice")
+            backlog.save()
+
+            backlog = Backlog(path)
+            self.assertEqual(len(backlog), 3)
+            self.assertEqual(backlog.stats, {"com:alice"})
+            backlog.resolve_problem("com", "two-sum")
+            self.assertEqual(backlog.pending_problems(),
+                             [{"domain": "cn", "slug": "two-sum", "username": "carol"}])
+
+    def test_invalid_file_starts_empty(self):
+        with tempfile.TemporaryDirectory() as scratch:
+            path = os.path.join(scratch, "request_backlog.json")
+            with open(path, "w") as f:
+                f.write("{")
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(len(Backlog(path)), 0)
+
+class Response:
+    def __init__(self, data, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps(data)
+
+    def json(self):
+        return json.loads(self.text)
+
+class FakeLeetCode:
+    """leetcode.com stand-in that logs each request as (kind, subject)."""
+
+    throttle = False
+
+    def __init__(self, submissions, rate_limited=()):
+        self.submissions = submissions
+        self.rate_limited = set(rate_limited)
+        self.log = []
+
+    def post(self, url, json=None, headers=None):
+        query, variables = json["query"], json["variables"]
+        if "recentAcSubmissionList" in query:
+            self.log.append(("activity", variables["username"]))
+            return Response({"data": {"recentAcSubmissionList": self.submissions.get(variables["username"], [])}})
+        if "questionData" in query:
+            slug = variables["titleSlug"]
+            self.log.append(("lookup", slug))
+            if slug in self.rate_limited:
+                return Response({}, 429)
+            return Response({"data": {"question": {"questionFrontendId": "1", "difficulty": "Easy"}}})
+        self.log.append(("stats", variables["username"]))
+        return Response({"data": {"matchedUser": {"submitStats": {"acSubmissionNum": [
+            {"difficulty": "All", "count": 1}, {"difficulty": "Easy", "count": 1}]}}}})
+
+    def get(self, url, **kwargs):
+        return Response({}, 500)
+
+    def Session(self):
+        return self
+
+class RequestOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.scratch = tempfile.TemporaryDirectory()
+        os.chdir(self.scratch.name)
+        self.now = int(time.time())
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.scratch.cleanup()
+
+    def write_json(self, path, data):
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+    def read_json(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def run_report(self, http, **config):
+        self.write_json("config.json", {"fetch_total_stats": True, **config})
+        with contextlib.redirect_stdout(io.StringIO()):
+            LeetCodeTracker(http=http).generate_report()
+
+    def test_stats_refreshes_come_after_every_lookup(self):
+        http = FakeLeetCode({"b": [{"id": "1", "title": "Two Sum", "titleSlug": "two-sum",
+                                    "timestamp": str(self.now - 60)}]})
+        self.run_report(http, users=["a", "b"], request_budget={"max_requests": 3})
+        self.assertEqual(http.log, [("activity", "a"), ("activity", "b"), ("lookup", "two-sum")])
+        self.assertEqual(self.read_json("request_backlog.json"),
+                         {"problems": [], "stats": ["com:a", "com:b"]})
+
+    def test_stale_snapshot_is_refreshed_once_and_last(self):
+        self.write_json("stats_cache.json", {"problems": {}, "snapshots": {"com:a": {
+            "Easy": 1, "Medium": 0, "Hard": 0, "Total": 1, "fetched_at": self.now - 86400}}})
+        self.write_json("request_backlog.json", {"problems": [], "stats": ["com:a"]})
+        http = FakeLeetCode({})
+        self.run_report(http, users=["a"])
+        self.assertEqual(http.log, [("activity", "a"), ("stats", "a")])
+        self.assertEqual(self.read_json("request_backlog.json")["stats"], [])
+
+    def test_rate_limited_lookup_is_deferred(self):
+        http = FakeLeetCode({"a": [{"id": "1", "title": "Two Sum", "titleSlug": "two-sum",
+                                    "timestamp": str(self.now - 60)}]}, rate_limited={"two-sum"})
+        self.run_report(http, users=["a"], fetch_total_stats=False)
+        self.assertEqual(http.log, [("activity", "a"), ("lookup", "two-sum")])
+        self.assertEqual(self.read_json("request_backlog.json")["problems"],
+                         [{"domain": "com", "slug": "two-sum", "username": "a"}])
+
+    def test_failed_backlog_retries_stay_queued(self):
+        self.write_json("request_backlog.json", {"stats": [], "problems": [
+            {"domain": "com", "slug": "p1", "username": "a"},
+            {"domain": "com", "slug": "p2", "username": "a"}]})
+        http = FakeLeetCode({}, rate_limited={"p1"})
+        self.run_report(http, users=["a"], fetch_total_stats=False)
+        # p2 is held back once the site has answered 429
+        self.assertEqual(http.log, [("lookup", "p1"), ("activity", "a")])
+        self.assertEqual([item["slug"] for item in self.read_json("request_backlog.json")["problems"]],
+                         ["p1", "p2"])
+
+        http = FakeLeetCode({})
+        self.run_report(http, users=["a"], fetch_total_stats=False)
+        self.assertEqual(http.log, [("lookup", "p1"), ("lookup", "p2"), ("activity", "a")])
+        self.assertEqual(self.read_json("request_backlog.json")["problems"], [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""Replay the recorded fixture run and check the reports it produces.
+
+``fixtures/replay.jsonl.gz`` was recorded with ``--record`` from a run over
+``fixtures/replay_config.json``: alice (leetcode.com) with two problems in the
+window and one older, bob (leetcode.cn) with one problem, and carol with none.
+Re-record it the same way whenever the tracker's requests change on purpose.
+
+    python -m unittest discover tests
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "tests", "fixtures")
+CASSETTE = os.path.join(FIXTURES, "replay.jsonl.gz")
+CONFIG = os.path.join(FIXTURES, "replay_config.json")
+sys.path.insert(0, ROOT)
+
+from cassette import CassetteMissError, CassettePlayer, CassetteRecorder
+from generate_web_report import generate_web_report
+from leetcode_tracker import LeetCodeTracker
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        # Run from an empty directory to catch state files written outside the scratch dir
+        self.cwd = os.getcwd()
+        self.scratch = tempfile.TemporaryDirectory()
+        os.chdir(self.scratch.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.scratch.cleanup()
+
+    def replay(self, function, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            with CassettePlayer(CASSETTE) as player:
+                result = function(*args, http=player, **kwargs)
+        self.assertFalse(os.path.exists(player.state_dir))
+        return result
+
+    def test_generate_report(self):
+        def report(http):
+            return LeetCodeTracker(CONFIG, http=http).generate_report()
+
+        report_data = self.replay(report)
+        self.assertEqual(report_data["alice"]["stats"],
+                         {"recent_total": 2, "easy": 1, "medium": 1, "hard": 0, "unique": 2})
+        self.assertEqual(report_data["alice"]["total_stats"],
+                         {"Easy": 10, "Medium": 2, "Hard": 0, "Total": 12})
+        self.assertEqual(report_data["bob"]["stats"],
+                         {"recent_total": 1, "easy": 0, "medium": 0, "hard": 1, "unique": 1})
+        self.assertEqual(report_data["carol"]["stats"]["recent_total"], 0)
+        self.assertEqual(report_data["bob"]["streak"], {"current": 1, "longest": 1, "active_days": 1})
+        # Replays start from the same empty state, so they repeat exactly
+        self.assertEqual(self.replay(report), report_data)
+        self.assertEqual(os.listdir("."), [])
+
+    def test_generate_web_report(self):
+        self.replay(generate_web_report, "first.json", config_file=CONFIG)
+        self.replay(generate_web_report, "second.json", config_file=CONFIG)
+        with open("first.json") as f:
+            first = f.read()
+        with open("second.json") as f:
+            self.assertEqual(f.read(), first)
+        self.assertEqual(sorted(os.listdir(".")), ["first.json", "second.json"])
+
+        report = json.loads(first)
+        self.assertEqual(
+            [(s["username"], s["titleSlug"], s["difficulty"]) for s in report["submissions"]],
+            [("alice", "two-sum", "Easy"), ("alice", "valid-parentheses", "Medium"),
+             ("alice", "old-problem", "Hard"), ("bob", "trapping-rain-water", "Hard")]
+        )
+        self.assertEqual([user["display_name"] for user in report["all_users"]], ["Alice", "Bob", "carol"])
+
+    def test_miss_fails_the_run(self):
+        with open(CONFIG) as f:
+            config = json.load(f)
+        config["users"].append("dave")
+        with open("config.json", "w") as f:
+            json.dump(config, f)
+
+        with self.assertRaises(CassetteMissError):
+            self.replay(lambda http: LeetCodeTracker("config.json", http=http).generate_report())
+
+    def test_recorded_state_is_restored(self):
+        with open("stats_cache.json", "w") as f:
+            json.dump({"snapshots": {}, "problems": {"com:two-sum": "Easy"}}, f)
+        recorder = CassetteRecorder("run.jsonl.gz")
+        recorder.snapshot_state(["stats_cache.json", "streaks.json"])
+        recorder.close()
+
+        with CassettePlayer("run.jsonl.gz") as player:
+            self.assertEqual(os.listdir(player.state_dir), ["stats_cache.json"])
+            with open(os.path.join(player.state_dir, "stats_cache.json")) as f:
+                restored = f.read()
+        with open("stats_cache.json") as f:
+            self.assertEqual(restored, f.read())
+
+if __name__ == "__main__":
+    unittest.main()
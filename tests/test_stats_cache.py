@@ -0,0 +1,66 @@
+"""Tests for the total stats cache and difficulty inference from stats deltas."""
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stats_cache import StatsCache, infer_difficulty, stats_delta
+
+def snapshot(easy=0, medium=0, hard=0):
+    return {"Easy": easy, "Medium": medium, "Hard": hard, "Total": easy + medium + hard}
+
+class InferDifficultyTest(unittest.TestCase):
+    def test_unambiguous_delta(self):
+        old = snapshot(10, 5, 1)
+        self.assertEqual(infer_difficulty(old, snapshot(12, 5, 1), {"a", "b"}, True), "Easy")
+        self.assertEqual(infer_difficulty(old, snapshot(10, 5, 2), {"c"}, True), "Hard")
+
+    def test_several_difficulties_grew(self):
+        self.assertIsNone(infer_difficulty(snapshot(10, 5), snapshot(11, 6), {"a", "b"}, True))
+
+    def test_delta_does_not_match_new_problems(self):
+        # One more Easy than the activity list explains: a solve is missing from it
+        self.assertIsNone(infer_difficulty(snapshot(10), snapshot(12), {"a"}, True))
+        self.assertIsNone(infer_difficulty(snapshot(10), snapshot(11), {"a", "b"}, True))
+
+    def test_activity_not_covering_snapshot(self):
+        self.assertIsNone(infer_difficulty(snapshot(10), snapshot(11), {"a"}, False))
+
+    def test_no_new_problems(self):
+        self.assertIsNone(infer_difficulty(snapshot(10), snapshot(10), set(), True))
+
+    def test_counts_went_down(self):
+        self.assertIsNone(stats_delta(snapshot(10), snapshot(9)))
+        self.assertIsNone(infer_difficulty(snapshot(10, 1), snapshot(9, 3), {"a", "b"}, True))
+
+class StatsCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.scratch = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.scratch.name, "stats_cache.json")
+
+    def tearDown(self):
+        self.scratch.cleanup()
+
+    def test_round_trip_and_ttl(self):
+        cache = StatsCache(self.path, ttl_seconds=3600)
+        cache.put_snapshot("com:alice", snapshot(3, 2, 1), 1000)
+        cache.put_difficulty("com:two-sum", "Easy")
+        cache.put_difficulty("com:unknown", "Unknown")
+        cache.save()
+
+        cache = StatsCache(self.path, ttl_seconds=3600)
+        entry = cache.get_snapshot("com:alice")
+        self.assertEqual(entry["Total"], 6)
+        self.assertTrue(cache.is_fresh(entry, 1000 + 3599))
+        self.assertFalse(cache.is_fresh(entry, 1000 + 3600))
+        self.assertEqual(cache.get_difficulty("com:two-sum"), "Easy")
+        self.assertIsNone(cache.get_difficulty("com:unknown"))
+
+    def test_save_creates_missing_file(self):
+        StatsCache(self.path, ttl_seconds=3600).save()
+        self.assertTrue(os.path.exists(self.path))
+
+if __name__ == "__main__":
+    unittest.main()